@@ -0,0 +1,246 @@
+import numba as nb
+import numpy as np
+
+# log-density sentinel for bins outside the accessible region: large and
+# negative so exp() underflows to zero, yet finite, so a convex mix or a
+# multiplication by a weight cannot turn it into nan the way -inf can
+LOG_RHO_EMPTY = -1.0e30
+
+# fastmath without the nnan assumption: the full 'fast' set lets LLVM assume
+# no NaNs exist, which makes max() reductions and isnan() silently drop them
+# and would defeat the divergence guards in the minimisers
+_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+
+@nb.njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def max_abs_diff(a, b):
+    """
+    Return max(abs(a - b)) in a single pass, without the difference and
+    absolute-value temporaries of the chained NumPy expression. NaN
+    anywhere in the inputs yields NaN, as with np.max.
+    """
+    n = a.shape[0]
+    delta = 0.0
+    check = 0.0
+    for i in nb.prange(n):
+        val = abs(a[i] - b[i])
+        delta = max(delta, val)
+        check += val
+    # max() drops NaN, so a summed accumulator restores NaN propagation
+    if np.isnan(check):
+        delta = np.nan
+    return delta
+
+
+@nb.njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def max_abs_diff_exp(log_a, log_b):
+    """
+    Return (max(abs(exp(log_a) - exp(log_b))), max(exp(log_b))) in a single
+    pass, keeping the exponentials in registers instead of materialising
+    both arrays. NaN anywhere in the inputs yields NaN, as with np.max.
+    """
+    n = log_a.shape[0]
+    delta = 0.0
+    rho_max = 0.0
+    check = 0.0
+    for i in nb.prange(n):
+        rho_b = np.exp(log_b[i])
+        val = abs(np.exp(log_a[i]) - rho_b)
+        delta = max(delta, val)
+        check += val
+        rho_max = max(rho_max, rho_b)
+    # max() drops NaN, so a summed accumulator restores NaN propagation
+    if np.isnan(check):
+        delta = np.nan
+    return delta, rho_max
+
+
+@nb.njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def picard_step_onetype(log_rho, rho, muloc, c1_pred, valid, alpha):
+    """
+    Perform one log-space Picard update for a single species in place.
+
+    Computes the mix, the exponentials, the running convergence measure and
+    the density maximum in a single parallel pass over the grid, without any
+    array temporaries.
+
+    Parameters:
+    log_rho (numpy.ndarray): Log-density profile, updated in place.
+    rho (numpy.ndarray): Density profile, updated in place.
+    muloc (numpy.ndarray): Local chemical potential.
+    c1_pred (numpy.ndarray): Predicted one-body direct correlation profile.
+    valid (numpy.ndarray): Boolean mask of bins with finite muloc.
+    alpha (float): Picard mixing parameter.
+
+    Returns:
+    tuple: Maximum absolute density change (convergence measure) and the
+           maximum of the updated density.
+    """
+    n = log_rho.shape[0]
+    delta = 0.0
+    rho_max = 0.0
+    check = 0.0
+    for i in nb.prange(n):
+        if valid[i]:
+            log_new = muloc[i] + c1_pred[i]
+            log_mix = (1.0 - alpha) * log_rho[i] + alpha * log_new
+            rho_mix = np.exp(log_mix)
+            val = abs(np.exp(log_new) - rho_mix)
+            delta = max(delta, val)
+            check += val
+            rho_max = max(rho_max, rho_mix)
+            log_rho[i] = log_mix
+            rho[i] = rho_mix
+        else:
+            log_rho[i] = LOG_RHO_EMPTY
+            rho[i] = 0.0
+    # max() drops NaN, so a summed accumulator restores NaN propagation
+    if np.isnan(check):
+        delta = np.nan
+    return delta, rho_max
+
+
+@nb.njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def picard_step_twotype(log_rho_H, rho_H, muloc_H, c1_H_pred, validH,
+                        log_rho_O, rho_O, muloc_O, c1_O_pred, validO, alpha):
+    """
+    Perform one log-space Picard update for both species in place.
+
+    Fuses the H and O updates, the convergence measure and the density
+    maximum into a single parallel pass so that both sets of arrays stream
+    through the cache once per iteration.
+
+    Parameters:
+    log_rho_H, log_rho_O (numpy.ndarray): Log-density profiles, updated in place.
+    rho_H, rho_O (numpy.ndarray): Density profiles, updated in place.
+    muloc_H, muloc_O (numpy.ndarray): Local chemical potentials.
+    c1_H_pred, c1_O_pred (numpy.ndarray): Predicted one-body direct correlation profiles.
+    validH, validO (numpy.ndarray): Boolean masks of bins with finite muloc.
+    alpha (float): Picard mixing parameter.
+
+    Returns:
+    tuple: Maximum absolute density change over both species and the
+           maximum of the updated densities over both species.
+    """
+    n = log_rho_H.shape[0]
+    delta = 0.0
+    rho_max = 0.0
+    check = 0.0
+    for i in nb.prange(n):
+        if validH[i]:
+            log_new = muloc_H[i] + c1_H_pred[i]
+            log_mix = (1.0 - alpha) * log_rho_H[i] + alpha * log_new
+            rho_mix = np.exp(log_mix)
+            val = abs(np.exp(log_new) - rho_mix)
+            delta = max(delta, val)
+            check += val
+            rho_max = max(rho_max, rho_mix)
+            log_rho_H[i] = log_mix
+            rho_H[i] = rho_mix
+        else:
+            log_rho_H[i] = LOG_RHO_EMPTY
+            rho_H[i] = 0.0
+        if validO[i]:
+            log_new = muloc_O[i] + c1_O_pred[i]
+            log_mix = (1.0 - alpha) * log_rho_O[i] + alpha * log_new
+            rho_mix = np.exp(log_mix)
+            val = abs(np.exp(log_new) - rho_mix)
+            delta = max(delta, val)
+            check += val
+            rho_max = max(rho_max, rho_mix)
+            log_rho_O[i] = log_mix
+            rho_O[i] = rho_mix
+        else:
+            log_rho_O[i] = LOG_RHO_EMPTY
+            rho_O[i] = 0.0
+    # max() drops NaN, so a summed accumulator restores NaN propagation
+    if np.isnan(check):
+        delta = np.nan
+    return delta, rho_max
+
+@nb.njit(parallel=True, fastmath=_FASTMATH, cache=True)
+def picard_step_twotype_lr(log_rho_H, rho_H, muloc_H, c1_H_SR, validH, mu_H_corr, q_H,
+                           log_rho_O, rho_O, muloc_O, c1_O_SR, validO, mu_O_corr, q_O,
+                           delta_phi, alpha):
+    """
+    Long-range variant of picard_step_twotype.
+
+    Folds the electrostatic correction c1_SR - mu_corr + q * delta_phi for
+    both species into the same parallel pass as the Picard update, so
+    delta_phi is streamed once and the two corrected-c1 temporaries of the
+    NumPy formulation disappear.
+
+    Parameters:
+    log_rho_H, log_rho_O (numpy.ndarray): Log-density profiles, updated in place.
+    rho_H, rho_O (numpy.ndarray): Density profiles, updated in place.
+    muloc_H, muloc_O (numpy.ndarray): Local chemical potentials.
+    c1_H_SR, c1_O_SR (numpy.ndarray): Short-range one-body direct correlation profiles.
+    validH, validO (numpy.ndarray): Boolean masks of bins with finite muloc.
+    mu_H_corr, mu_O_corr (float): Chemical potential corrections.
+    q_H, q_O (float): Species charges.
+    delta_phi (numpy.ndarray): Restructuring electrostatic potential.
+    alpha (float): Picard mixing parameter.
+
+    Returns:
+    tuple: Maximum absolute density change over both species and the
+           maximum of the updated densities over both species.
+    """
+    n = log_rho_H.shape[0]
+    delta = 0.0
+    rho_max = 0.0
+    check = 0.0
+    for i in nb.prange(n):
+        dphi = delta_phi[i]
+        if validH[i]:
+            log_new = muloc_H[i] + c1_H_SR[i] - mu_H_corr + q_H * dphi
+            log_mix = (1.0 - alpha) * log_rho_H[i] + alpha * log_new
+            rho_mix = np.exp(log_mix)
+            val = abs(np.exp(log_new) - rho_mix)
+            delta = max(delta, val)
+            check += val
+            rho_max = max(rho_max, rho_mix)
+            log_rho_H[i] = log_mix
+            rho_H[i] = rho_mix
+        else:
+            log_rho_H[i] = LOG_RHO_EMPTY
+            rho_H[i] = 0.0
+        if validO[i]:
+            log_new = muloc_O[i] + c1_O_SR[i] - mu_O_corr + q_O * dphi
+            log_mix = (1.0 - alpha) * log_rho_O[i] + alpha * log_new
+            rho_mix = np.exp(log_mix)
+            val = abs(np.exp(log_new) - rho_mix)
+            delta = max(delta, val)
+            check += val
+            rho_max = max(rho_max, rho_mix)
+            log_rho_O[i] = log_mix
+            rho_O[i] = rho_mix
+        else:
+            log_rho_O[i] = LOG_RHO_EMPTY
+            rho_O[i] = 0.0
+    # max() drops NaN, so a summed accumulator restores NaN propagation
+    if np.isnan(check):
+        delta = np.nan
+    return delta, rho_max
+
+# Eager specialisation of the shapes the minimisers actually use: the density
+# buffers are contiguous float32, the electrostatics stay float64 and the
+# Anderson residual vectors are float64 once the mixer has run. Compiling
+# these signatures at import moves the JIT cost out of the first Picard
+# iteration, and cache=True persists the binaries across processes, which is
+# as close to ahead-of-time compilation as the numba toolchain gets. Calls
+# with other types still fall back to lazy dispatch.
+_f4 = nb.float32[::1]
+_f8 = nb.float64[::1]
+_b1 = nb.boolean[::1]
+
+max_abs_diff.compile((_f4, _f4))
+max_abs_diff.compile((_f8, _f8))
+max_abs_diff_exp.compile((_f4, _f8))
+max_abs_diff_exp.compile((_f8, _f8))
+picard_step_onetype.compile((_f4, _f4, _f4, _f4, _b1, nb.float64))
+picard_step_twotype.compile((_f4, _f4, _f4, _f4, _b1,
+                             _f4, _f4, _f4, _f4, _b1, nb.float64))
+picard_step_twotype_lr.compile((_f4, _f4, _f4, _f4, _b1, nb.float64, nb.float64,
+                                _f4, _f4, _f4, _f4, _b1, nb.float64, nb.float64,
+                                _f8, nb.float64))
+
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class AndersonMixer:
+    """
+    Anderson (DIIS) acceleration for fixed-point iterations.
+
+    Keeps the last m iterates x_k and residuals F_k = g(x_k) - x_k and
+    extrapolates the next iterate from the combination of stored residuals
+    with the smallest norm, obtained from a least-squares solve on the
+    (m, m) Gram matrix. The solve is negligible compared to one neural
+    forward pass but typically cuts the iteration count several-fold
+    relative to plain Picard mixing.
+
+    Parameters:
+    - m (int): Number of stored iterates (the mixing depth).
+    - beta (float): Default damping applied to the residuals.
+    """
+
+    def __init__(self, m=6, beta=1.0):
+        self.m = m
+        self.beta = beta
+        self._iterates = []
+        self._residuals = []
+
+    def reset(self):
+        """Discard the stored history."""
+        self._iterates = []
+        self._residuals = []
+
+    def update(self, x, gx, beta=None):
+        """
+        Return the next iterate given the current iterate x and the
+        fixed-point map value g(x).
+
+        Falls back to damped Picard mixing, x + beta * (g(x) - x), until at
+        least two residuals are stored or when the Gram system is degenerate.
+
+        Parameters:
+        - x (np.ndarray): Current iterate.
+        - gx (np.ndarray): Fixed-point map evaluated at x.
+        - beta (float): Damping parameter; defaults to the value set at
+                        construction.
+
+        Returns:
+        - np.ndarray: The next iterate.
+        """
+        if beta is None:
+            beta = self.beta
+        residual = gx - x
+
+        self._iterates.append(x.copy())
+        self._residuals.append(residual)
+        if len(self._iterates) > self.m:
+            self._iterates.pop(0)
+            self._residuals.pop(0)
+
+        n_stored = len(self._residuals)
+        if n_stored < 2:
+            return x + beta * residual
+
+        residual_matrix = np.stack(self._residuals)
+        gram = residual_matrix @ residual_matrix.T
+        if not np.all(np.isfinite(gram)):
+            # NaN/inf residuals from a diverging trajectory would make the
+            # SVD inside lstsq raise; fall back to damped Picard so the NaN
+            # reaches the minimiser's own divergence guard instead
+            return x + beta * residual
+        coef, *_ = np.linalg.lstsq(gram, np.ones(n_stored), rcond=None)
+        norm = coef.sum()
+        if not np.isfinite(norm) or abs(norm) < 1e-14:
+            return x + beta * residual
+        coef /= norm
+
+        iterate_matrix = np.stack(self._iterates)
+        return coef @ (iterate_matrix + beta * residual_matrix)
@@ -2,8 +2,22 @@ import numpy as np
 import lmft_utils as lmft
 import plot_utils as plt
 import neural_utils as neural
+import _picard_kernels as kernels
+import anderson
 import scipy.constants as const
 
+# numexpr fuses a few array expressions in the LR loop, but only the CPU
+# environment ships it; fall back to plain NumPy when it is missing
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
+
+# Coulomb energy prefactor of the chemical-potential correction, in J per
+# Angstrom; hoisted out of mu_correction so repeated calls in sweeps do not
+# redo the constant arithmetic
+_MU_PREFACTOR = const.elementary_charge**2 / (4 * const.pi * const.epsilon_0 * 1e-10)
+
 alpha_updates_default_onetype = {
     10: 0.0001,
     20: 0.001,
@@ -81,11 +95,54 @@ alpha_restr_updates_default = {
 }
 
 
+def _line_search_alpha_onetype(model, log_rho, muloc, c1_pred, valid, alpha,
+                               factors, input_bins, output_dict):
+    """
+    Pick the Picard parameter among alpha * factors that minimises the
+    residual, evaluating all candidate densities in one batched forward pass.
+    """
+    alphas = alpha * np.asarray(factors)
+    log_rho_new = np.where(valid, muloc + c1_pred, kernels.LOG_RHO_EMPTY)
+    cand_log_rho = np.where(valid, (1 - alphas[:, None]) * log_rho
+                            + alphas[:, None] * log_rho_new, kernels.LOG_RHO_EMPTY)
+    cand_rho = np.exp(cand_log_rho)
+    c1_batch = neural.c1_onetype_batch(model, cand_rho, input_bins, output_dict=output_dict)
+    cand_rho_new = np.exp(np.where(valid, muloc + c1_batch, kernels.LOG_RHO_EMPTY))
+    deltas = np.max(np.abs(cand_rho_new - cand_rho), axis=1)
+    return float(alphas[np.argmin(deltas)])
+
+
+def _line_search_alpha_twotype(model_H, model_O, log_rho_H, log_rho_O,
+                               muloc_H, muloc_O, c1_H_pred, c1_O_pred,
+                               validH, validO, alpha, factors, input_bins, output_dict):
+    """
+    Two-type analogue of _line_search_alpha_onetype; both species enter the
+    same batched forward pass and the residual is the maximum over species.
+    """
+    alphas = alpha * np.asarray(factors)
+    log_rho_H_new = np.where(validH, muloc_H + c1_H_pred, kernels.LOG_RHO_EMPTY)
+    log_rho_O_new = np.where(validO, muloc_O + c1_O_pred, kernels.LOG_RHO_EMPTY)
+    cand_log_rho_H = np.where(validH, (1 - alphas[:, None]) * log_rho_H
+                              + alphas[:, None] * log_rho_H_new, kernels.LOG_RHO_EMPTY)
+    cand_log_rho_O = np.where(validO, (1 - alphas[:, None]) * log_rho_O
+                              + alphas[:, None] * log_rho_O_new, kernels.LOG_RHO_EMPTY)
+    cand_rho_H = np.exp(cand_log_rho_H)
+    cand_rho_O = np.exp(cand_log_rho_O)
+    c1_H_batch, c1_O_batch = neural.c1_twotype_batch(model_H, model_O, cand_rho_H, cand_rho_O,
+                                                     input_bins, output_dict=output_dict)
+    cand_rho_H_new = np.exp(np.where(validH, muloc_H + c1_H_batch, kernels.LOG_RHO_EMPTY))
+    cand_rho_O_new = np.exp(np.where(validO, muloc_O + c1_O_batch, kernels.LOG_RHO_EMPTY))
+    deltas = np.maximum(np.max(np.abs(cand_rho_H_new - cand_rho_H), axis=1),
+                        np.max(np.abs(cand_rho_O_new - cand_rho_O), axis=1))
+    return float(alphas[np.argmin(deltas)])
+
+
 def minimise_SR_onetype(model, zbins, muloc, initial_guess, input_bins=1001,
                         plot=False, maxiter=10000, 
                         alpha_initial=1e-6, alpha_updates=None, 
                         print_every=1000, plot_every=1000, tolerance=5e-6,
-                        output_dict=False):
+                        line_search_every=0, line_search_factors=(0.5, 1.0, 2.0),
+                        anderson_depth=0, c1_refresh_tol=1e-5, output_dict=False):
     """
     Calculate the density profile with neural DFT using a standard Picard iteration.
 
@@ -101,26 +158,51 @@ def minimise_SR_onetype(model, zbins, muloc, initial_guess, input_bins=1001,
     - print_every (int): Print the iteration number every n steps.
     - plot_every (int): Update the plot every n steps.
     - tolerance (float): Convergence tolerance.
+    - line_search_every (int): If > 0, re-pick alpha every n steps from a batched
+                               line search over alpha * line_search_factors.
+    - line_search_factors (tuple): Candidate multipliers for the line search.
+    - anderson_depth (int): Depth m of the Anderson (DIIS) mixer; 0 keeps
+                            plain Picard mixing.
+    - c1_refresh_tol (float): Skip the neural c1 evaluation while the density
+                              has drifted by less than this relative amount
+                              since the last evaluation; 0 refreshes every step.
 
     Returns:
     - tuple: z coordinates and density profile.
     """
-    
-    # setting up grid
-    rho_new = np.zeros_like(zbins)
+
+    # setting up grid; float32 internally, since the tolerances sit far above
+    # single-precision eps and the model runs in float32 anyway
+    dtype = np.float32
+    muloc = np.asarray(muloc, dtype=dtype)
     valid = np.isfinite(muloc)
-    rho = initial_guess * np.ones_like(zbins)
+    rho = initial_guess * np.ones(zbins.shape, dtype=dtype)
     L = zbins[-1] - zbins[0]
-    log_rho_new = np.zeros_like(zbins)
-    log_rho = np.zeros_like(zbins)
-    valid = np.isfinite(muloc)
+    log_rho = np.zeros(zbins.shape, dtype=dtype)
     log_rho[valid] = np.log(initial_guess)
-    log_rho[~valid] = -np.inf 
+    log_rho[~valid] = kernels.LOG_RHO_EMPTY
 
     # Picard iteration parameter
     alpha = alpha_initial
     if alpha_updates is None:
         alpha_updates = alpha_updates_default_onetype
+    # schedule as sorted arrays, so the loop only compares integers
+    alpha_keys = sorted(alpha_updates)
+    alpha_vals = [alpha_updates[k] for k in alpha_keys]
+    alpha_ptr = 0
+
+    mixer = anderson.AndersonMixer(m=anderson_depth) if anderson_depth else None
+    if mixer is not None:
+        # loop invariants: index of valid bins and the gathered muloc slice
+        idx_valid = np.flatnonzero(valid)
+        muloc_v = muloc.take(idx_valid)
+        log_rho_v = log_rho.take(idx_valid)
+
+    # one traced graph for padding, window build and forward pass
+    c1_fn = neural.compile_c1_onetype(model, input_bins, output_dict=output_dict)
+    c1_pred = None
+    rho_at_last_c1 = np.zeros_like(rho)
+    rho_max = float(np.max(rho))  # kept current by the step kernels below
 
     if plot:
         fig, ax = plt.configure_plot(zbins)
@@ -128,32 +210,42 @@ def minimise_SR_onetype(model, zbins, muloc, initial_guess, input_bins=1001,
 
 
     for i in range(maxiter + 1):
-        if i in alpha_updates:
-            alpha = alpha_updates[i]
+        if alpha_ptr < len(alpha_keys) and i == alpha_keys[alpha_ptr]:
+            alpha = alpha_vals[alpha_ptr]
+            alpha_ptr += 1
 
         if plot and i % plot_every == 0:
             plt.plot_interactive_SR_onetype(fig, ax, zbins, rho, muloc, color_count)
             color_count += 1
 
-        # correlation from trained SR model
-        c1_pred = neural.c1_onetype(model, rho, input_bins, output_dict=output_dict)
-        
-        # update density
-        log_rho_new[valid] = muloc[valid] + c1_pred[valid]
-        log_rho_new[~valid] = -np.inf 
-        rho_new = np.exp(log_rho_new)
-        log_rho = (1 - alpha) * log_rho + alpha * log_rho_new
-        rho = np.exp(log_rho)
-        
-        # check convergence
-        delta = np.max(np.abs(rho_new - rho))
-         
+        # correlation from trained SR model, refreshed only once the density
+        # has drifted appreciably since the last evaluation
+        if c1_pred is None or kernels.max_abs_diff(rho, rho_at_last_c1) >= c1_refresh_tol * rho_max:
+            c1_pred = c1_fn(rho)
+            rho_at_last_c1[:] = rho
+
+        if line_search_every and i > 0 and i % line_search_every == 0:
+            alpha = _line_search_alpha_onetype(model, log_rho, muloc, c1_pred, valid,
+                                               alpha, line_search_factors, input_bins,
+                                               output_dict)
+
+        # update density and check convergence
+        if mixer is None:
+            delta, rho_max = kernels.picard_step_onetype(log_rho, rho, muloc, c1_pred, valid, alpha)
+        else:
+            log_rho_new_v = muloc_v + c1_pred.take(idx_valid)
+            log_rho_v = mixer.update(log_rho_v, log_rho_new_v, beta=alpha)
+            log_rho.put(idx_valid, log_rho_v)
+            np.exp(log_rho, out=rho)
+            delta, rho_max = kernels.max_abs_diff_exp(log_rho_new_v, log_rho_v)
 
         if np.isnan(delta):
             print("Not converged: delta is NaN")
             return None, None
         
-        relative_error = delta / np.max(rho)
+        # rho_max is a plain float and the f32 densities can underflow to
+        # exactly zero on a divergent trajectory, so guard the division
+        relative_error = delta / rho_max if rho_max > 0.0 else np.inf
         
         if plot and i % print_every == 0:
             print(f"Iteration {i}: delta = {delta}")
@@ -168,11 +260,105 @@ def minimise_SR_onetype(model, zbins, muloc, initial_guess, input_bins=1001,
     return None, None
 
 
+def minimise_SR_onetype_batch(model, zbins, muloc_batch, initial_guess, input_bins=1001,
+                              maxiter=10000,
+                              alpha_initial=1e-6, alpha_updates=None,
+                              print_every=1000, tolerance=5e-6, output_dict=False):
+    """
+    Calculate the density profiles of a batch of independent state points
+    with neural DFT using a standard Picard iteration.
+
+    All profiles share the grid and the iteration schedule and advance in
+    lock step, so every iteration evaluates the model once on the whole
+    batch. This trades per-profile latency for throughput: a sweep over B
+    chemical potentials costs roughly one forward pass per iteration
+    instead of B. Rows that have converged are frozen but stay in the
+    forward pass, keeping the batch shape stable for the compiled model.
+
+    Parameters:
+    - model (tf.keras.Model): Keras model for calculating the one-body direct correlation function.
+    - zbins (array-like): Spatial grid points, shared by all profiles.
+    - muloc_batch (array-like): Local chemical potentials, shape (B, len(zbins)).
+    - initial_guess (float): Initial guess for the density profiles.
+    - maxiter (int): Maximum number of Picard steps.
+    - alpha_initial (float): Initial value for the Picard parameter alpha.
+    - alpha_updates (dict): Iteration thresholds and corresponding alpha values.
+    - print_every (int): Print the iteration number every n steps.
+    - tolerance (float): Convergence tolerance, applied per profile.
+
+    Returns:
+    - tuple: z coordinates, density profiles of shape (B, len(zbins)) and a
+             boolean array marking which profiles converged.
+    """
+
+    # setting up grid; float32 internally, as in minimise_SR_onetype
+    dtype = np.float32
+    muloc_batch = np.atleast_2d(np.asarray(muloc_batch, dtype=dtype))
+    valid = np.isfinite(muloc_batch)
+    nbatch = muloc_batch.shape[0]
+    rho = initial_guess * np.ones(muloc_batch.shape, dtype=dtype)
+    log_rho = np.zeros(muloc_batch.shape, dtype=dtype)
+    log_rho[valid] = np.log(initial_guess)
+    log_rho[~valid] = kernels.LOG_RHO_EMPTY
+
+    # Picard iteration parameter
+    alpha = alpha_initial
+    if alpha_updates is None:
+        alpha_updates = alpha_updates_default_onetype
+    # schedule as sorted arrays, so the loop only compares integers
+    alpha_keys = sorted(alpha_updates)
+    alpha_vals = [alpha_updates[k] for k in alpha_keys]
+    alpha_ptr = 0
+
+    active = np.ones(nbatch, dtype=bool)
+    converged = np.zeros(nbatch, dtype=bool)
+
+    for i in range(maxiter + 1):
+        if alpha_ptr < len(alpha_keys) and i == alpha_keys[alpha_ptr]:
+            alpha = alpha_vals[alpha_ptr]
+            alpha_ptr += 1
+
+        # correlation from trained SR model, one forward pass for the batch
+        c1_batch = neural.c1_onetype_batch(model, rho, input_bins, output_dict=output_dict)
+
+        # update density row-wise and check convergence per profile
+        log_rho_new = np.where(valid, muloc_batch + c1_batch, kernels.LOG_RHO_EMPTY)
+        log_mix = (1 - alpha) * log_rho + alpha * log_rho_new
+        rho_mix = np.exp(log_mix)
+        deltas = np.max(np.abs(np.exp(log_rho_new) - rho_mix), axis=1)
+        log_rho[active] = log_mix[active]
+        rho[active] = rho_mix[active]
+
+        failed = active & np.isnan(deltas)
+        if np.any(failed):
+            print(f"Not converged: delta is NaN for profiles {np.flatnonzero(failed)}")
+            active &= ~failed
+
+        relative_errors = deltas / np.max(rho, axis=1)
+        converged_now = active & ((deltas < tolerance) | (relative_errors < tolerance))
+        if np.any(converged_now):
+            print(f"Converged after {i} iterations: profiles {np.flatnonzero(converged_now)}")
+            converged |= converged_now
+            active &= ~converged_now
+
+        if i % print_every == 0:
+            print(f"Iteration {i}: max delta = {np.max(deltas[active]) if np.any(active) else 0.0}"
+                  f" ({np.count_nonzero(active)} of {nbatch} profiles active)")
+
+        if not np.any(active):
+            break
+
+    if not np.all(converged):
+        print(f"Not converged after {i} iterations: profiles {np.flatnonzero(~converged)}")
+    return zbins, rho, converged
+
+
 def minimise_SR_twotype(model_H, model_O, zbins, muloc_H, muloc_O, input_bins=335,
                         plot=True, maxiter=100000, alpha_initial=0.000001, 
                         alpha_updates=None, initial_guess=0.04,
                         print_every=1000, plot_every=1000, tolerance=1e-5,
-                        output_dict=False):
+                        line_search_every=0, line_search_factors=(0.5, 1.0, 2.0),
+                        anderson_depth=0, c1_refresh_tol=1e-5, output_dict=False):
     """
     Calculate the density profile with neural DFT using a standard Picard iteration.
 
@@ -187,75 +373,114 @@ def minimise_SR_twotype(model_H, model_O, zbins, muloc_H, muloc_O, input_bins=33
     - plot (bool): Toggle interactive plotting.
     - maxiter (int): Maximum number of Picard steps.
     - alpha_initial (float): Initial value for the relaxation parameter alpha.
-    - alpha_updates (dict): Dictionary of iteration thresholds and corresponding 
+    - alpha_updates (dict): Dictionary of iteration thresholds and corresponding
                             alpha values to update alpha during iterations.
     - initial_guess (float): Initial guess for the density profile.
+    - line_search_every (int): If > 0, re-pick alpha every n steps from a batched
+                               line search over alpha * line_search_factors.
+    - line_search_factors (tuple): Candidate multipliers for the line search.
+    - anderson_depth (int): Depth m of the Anderson (DIIS) mixer; 0 keeps
+                            plain Picard mixing.
+    - c1_refresh_tol (float): Skip the neural c1 evaluation while the densities
+                              have drifted by less than this relative amount
+                              since the last evaluation; 0 refreshes every step.
 
     Returns:
     - tuple: z coordinates and density profile.
     """
-    
-    # setting up grid
-    rho_H_new = np.zeros_like(zbins)
-    rho_O_new = np.zeros_like(zbins)
-    validH = np.isfinite(muloc_H) 
+
+    # setting up grid; float32 internally, since the tolerances sit far above
+    # single-precision eps and the models run in float32 anyway
+    dtype = np.float32
+    muloc_H = np.asarray(muloc_H, dtype=dtype)
+    muloc_O = np.asarray(muloc_O, dtype=dtype)
+    validH = np.isfinite(muloc_H)
     validO = np.isfinite(muloc_O)
-    rho_H = initial_guess * np.ones_like(zbins)
-    rho_O = initial_guess * np.ones_like(zbins)
-    log_rho_H_new = np.zeros_like(zbins)
-    log_rho_O_new = np.zeros_like(zbins)
-    log_rho_H = np.zeros_like(zbins)
-    log_rho_O = np.zeros_like(zbins)
+    rho_H = initial_guess * np.ones(zbins.shape, dtype=dtype)
+    rho_O = initial_guess * np.ones(zbins.shape, dtype=dtype)
+    log_rho_H = np.zeros(zbins.shape, dtype=dtype)
+    log_rho_O = np.zeros(zbins.shape, dtype=dtype)
     log_rho_H[validH] = np.log(initial_guess)
     log_rho_O[validO] = np.log(initial_guess)
-    log_rho_H[~validH] = -np.inf
-    log_rho_O[~validO] = -np.inf
-    
-
+    log_rho_H[~validH] = kernels.LOG_RHO_EMPTY
+    log_rho_O[~validO] = kernels.LOG_RHO_EMPTY
 
     # Picard iteration parameter
     alpha = alpha_initial
     if alpha_updates is None:
         alpha_updates = alpha_updates_default_twotype
-    
+    # schedule as sorted arrays, so the loop only compares integers
+    alpha_keys = sorted(alpha_updates)
+    alpha_vals = [alpha_updates[k] for k in alpha_keys]
+    alpha_ptr = 0
+
+    # both species are concatenated into one residual vector for the mixer
+    mixer = anderson.AndersonMixer(m=anderson_depth) if anderson_depth else None
+    if mixer is not None:
+        # loop invariants: indices of valid bins and the gathered muloc slices
+        idxH = np.flatnonzero(validH)
+        idxO = np.flatnonzero(validO)
+        muloc_H_v = muloc_H.take(idxH)
+        muloc_O_v = muloc_O.take(idxO)
+        n_validH = len(idxH)
+        log_rho_v = np.concatenate((log_rho_H.take(idxH), log_rho_O.take(idxO)))
+
+    # one traced graph covering both forward passes per iteration
+    c1_fn = neural.compile_c1_twotype(model_H, model_O, input_bins, output_dict=output_dict)
+    c1_H_pred = None
+    rho_H_at_last_c1 = np.zeros_like(rho_H)
+    rho_O_at_last_c1 = np.zeros_like(rho_O)
+    rho_max = float(max(np.max(rho_H), np.max(rho_O)))  # kept current by the step kernels below
+
     if plot:
         fig, ax = plt.configure_plot(zbins)
         color_count = 0
   
     for i in range(maxiter + 1):
-        if i in alpha_updates:
-            alpha = alpha_updates[i]
-        
-        
+        if alpha_ptr < len(alpha_keys) and i == alpha_keys[alpha_ptr]:
+            alpha = alpha_vals[alpha_ptr]
+            alpha_ptr += 1
+
         if plot and i % plot_every == 0:
             plt.plot_interactive_SR_twotype(fig, ax, zbins, rho_H, rho_O, muloc_H, muloc_O, color_count)
             color_count += 1
             
-        # correlation from trained SR model
-        c1_H_pred, c1_O_pred = neural.c1_twotype(model_H, model_O, rho_H, rho_O, input_bins, return_c2=False, output_dict=output_dict)
-        
-        # update density
-        log_rho_H_new[validH] = muloc_H[validH]  + c1_H_pred[validH]
-        log_rho_O_new[validO] = muloc_O[validO]  + c1_O_pred[validO]
-        log_rho_H_new[~validH] = -np.inf
-        log_rho_O_new[~validO] = -np.inf
-        rho_H_new = np.exp(log_rho_H_new)
-        rho_O_new = np.exp(log_rho_O_new)
-        log_rho_H = (1 - alpha) * log_rho_H + alpha * log_rho_H_new
-        log_rho_O = (1 - alpha) * log_rho_O + alpha * log_rho_O_new
-        rho_H = np.exp(log_rho_H)
-        rho_O = np.exp(log_rho_O)
-        
-        
-        delta_H = np.max(np.abs(rho_H_new - rho_H))
-        delta_O = np.max(np.abs(rho_O_new - rho_O))
-        delta = max(delta_H, delta_O)
+        # correlation from trained SR model, refreshed only once the densities
+        # have drifted appreciably since the last evaluation
+        drift = max(kernels.max_abs_diff(rho_H, rho_H_at_last_c1),
+                    kernels.max_abs_diff(rho_O, rho_O_at_last_c1))
+        if c1_H_pred is None or drift >= c1_refresh_tol * rho_max:
+            c1_H_pred, c1_O_pred = c1_fn(rho_H, rho_O)
+            rho_H_at_last_c1[:] = rho_H
+            rho_O_at_last_c1[:] = rho_O
+
+        if line_search_every and i > 0 and i % line_search_every == 0:
+            alpha = _line_search_alpha_twotype(model_H, model_O, log_rho_H, log_rho_O,
+                                               muloc_H, muloc_O, c1_H_pred, c1_O_pred,
+                                               validH, validO, alpha, line_search_factors,
+                                               input_bins, output_dict)
+
+        # update density and check convergence
+        if mixer is None:
+            delta, rho_max = kernels.picard_step_twotype(log_rho_H, rho_H, muloc_H, c1_H_pred, validH,
+                                                         log_rho_O, rho_O, muloc_O, c1_O_pred, validO, alpha)
+        else:
+            log_rho_new_v = np.concatenate((muloc_H_v + c1_H_pred.take(idxH),
+                                            muloc_O_v + c1_O_pred.take(idxO)))
+            log_rho_v = mixer.update(log_rho_v, log_rho_new_v, beta=alpha)
+            log_rho_H.put(idxH, log_rho_v[:n_validH])
+            log_rho_O.put(idxO, log_rho_v[n_validH:])
+            np.exp(log_rho_H, out=rho_H)
+            np.exp(log_rho_O, out=rho_O)
+            delta, rho_max = kernels.max_abs_diff_exp(log_rho_new_v, log_rho_v)
         
         if np.isnan(delta):
             print("Not converged: delta is NaN")
             return  None, None, None
 
-        relative_error = delta / max(np.max(rho_O), np.max(rho_H))
+        # rho_max is a plain float and the f32 densities can underflow to
+        # exactly zero on a divergent trajectory, so guard the division
+        relative_error = delta / rho_max if rho_max > 0.0 else np.inf
         
         if i % print_every == 0:
             print(f"Iteration {i}: delta = {delta}")
@@ -271,11 +496,8 @@ def minimise_SR_twotype(model_H, model_O, zbins, muloc_H, muloc_O, input_bins=33
 
 
 def mu_correction(q, kappa_inv, temp):
-    prefactor = const.elementary_charge**2 /(4 * const.pi * const.epsilon_0 * 1e-10 )
-    beta = 1/ (const.Boltzmann * temp) 
-
     first = - q**2 / (kappa_inv * np.pi**0.5  )
-    return prefactor*first*beta
+    return _MU_PREFACTOR * first / (const.Boltzmann * temp)
 
 
 def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
@@ -284,7 +506,8 @@ def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
                         plot=True, maxiter=100000, alpha_initial=0.000001, 
                         alpha_updates=None, alpha_restr_updates=None, initial_guess=0.04,
                         print_every=1000, plot_every=1000, tolerance=1e-5,
-                        tolerance_restr = 1e-3, output_dict=False):
+                        tolerance_restr = 1e-3, anderson_depth=0, c1_refresh_tol=1e-5,
+                        output_dict=False):
     """
     Calculate the density profile with neural DFT using a standard Picard iteration 
     for two types of particles for long-range interactions.
@@ -307,38 +530,46 @@ def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
     - plot_every (int): Update the plot every n steps.
     - tolerance (float): Convergence tolerance for rho.
     - tolerance_restr (float): Convergence tolerance for the restructuring potential.
-    
+    - anderson_depth (int): Depth m of the Anderson (DIIS) mixer; 0 keeps
+                            plain Picard mixing.
+    - c1_refresh_tol (float): Skip the neural c1 evaluation and the
+                              restructuring transform while the densities have
+                              drifted by less than this relative amount since
+                              the last evaluation; 0 refreshes every step.
+
     
 
     Returns:
     - tuple: z coordinates and density profile.
     """
     
-    # setting up grid
-    rho_H_new = np.zeros_like(zbins)
-    rho_O_new = np.zeros_like(zbins)
-    validH = np.isfinite(muloc_H) 
+    # setting up grid; the densities are held in float32 (tolerances sit far
+    # above single-precision eps and the models run in float32 anyway), the
+    # electrostatics stay in float64
+    dtype = np.float32
+    muloc_H = np.asarray(muloc_H, dtype=dtype)
+    muloc_O = np.asarray(muloc_O, dtype=dtype)
+    validH = np.isfinite(muloc_H)
     validO = np.isfinite(muloc_O)
-    rho_H = initial_guess * np.ones_like(zbins)
-    rho_O = initial_guess * np.ones_like(zbins)
-    log_rho_H_new = np.zeros_like(zbins)
-    log_rho_O_new = np.zeros_like(zbins)
-    log_rho_H = np.zeros_like(zbins)
-    log_rho_O = np.zeros_like(zbins)
+    rho_H = initial_guess * np.ones(zbins.shape, dtype=dtype)
+    rho_O = initial_guess * np.ones(zbins.shape, dtype=dtype)
+    log_rho_H = np.zeros(zbins.shape, dtype=dtype)
+    log_rho_O = np.zeros(zbins.shape, dtype=dtype)
     log_rho_H[validH] = np.log(initial_guess)
     log_rho_O[validO] = np.log(initial_guess)
-    log_rho_H[~validH] = -np.inf
-    log_rho_O[~validO] = -np.inf
+    log_rho_H[~validH] = kernels.LOG_RHO_EMPTY
+    log_rho_O[~validO] = kernels.LOG_RHO_EMPTY
     prefactor_restructure = lmft.calculate_prefactor(temp, dielectric)
     delta_phi = np.zeros_like(zbins)
-    mu_H_correction = np.zeros_like(zbins)
-    mu_O_correction = np.zeros_like(zbins)
+    delta_phi_new = np.zeros_like(zbins)
     kbins = lmft.compute_wave_numbers(len(zbins), zbins[1] - zbins[0])
+    restr_kernel = lmft.restructure_kernel(kbins, kappa_inv)
+    charge_density = np.zeros_like(zbins)
     delta_restr = 1 # initial value for delta
     
-    # chemical potential correction
-    mu_H_correction = mu_correction(np.abs(q_H), kappa_inv, temp) * np.ones_like(zbins)
-    mu_O_correction = mu_correction(np.abs(q_O), kappa_inv, temp) * np.ones_like(zbins) 
+    # chemical potential correction, constant in space so kept as scalars
+    mu_H_correction = mu_correction(abs(q_H), kappa_inv, temp)
+    mu_O_correction = mu_correction(abs(q_O), kappa_inv, temp)
    
     # Picard iteration parameter
     alpha = alpha_initial
@@ -348,57 +579,96 @@ def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
         
     if alpha_restr_updates is None:
         alpha_restr_updates = alpha_restr_updates_default
-    
+    # schedules as sorted arrays, so the loop only compares integers
+    alpha_keys = sorted(alpha_updates)
+    alpha_vals = [alpha_updates[k] for k in alpha_keys]
+    alpha_ptr = 0
+    alpha_restr_keys = sorted(alpha_restr_updates)
+    alpha_restr_vals = [alpha_restr_updates[k] for k in alpha_restr_keys]
+    alpha_restr_ptr = 0
+
+    # both species are concatenated into one residual vector for the mixer
+    mixer = anderson.AndersonMixer(m=anderson_depth) if anderson_depth else None
+    if mixer is not None:
+        # loop invariants: indices of valid bins and the gathered muloc slices
+        idxH = np.flatnonzero(validH)
+        idxO = np.flatnonzero(validO)
+        muloc_H_v = muloc_H.take(idxH)
+        muloc_O_v = muloc_O.take(idxO)
+        n_validH = len(idxH)
+        log_rho_v = np.concatenate((log_rho_H.take(idxH), log_rho_O.take(idxO)))
+
+    # one traced graph covering both forward passes per iteration
+    c1_fn = neural.compile_c1_twotype(model_H, model_O, input_bins, output_dict=output_dict)
+    c1_H_pred_SR = None
+    rho_H_at_last_c1 = np.zeros_like(rho_H)
+    rho_O_at_last_c1 = np.zeros_like(rho_O)
+    rho_max = float(max(np.max(rho_H), np.max(rho_O)))  # kept current by the step kernels below
+
     if plot:
         fig, ax = plt.configure_4panels(zbins)
         color_count = 0
   
     for i in range(maxiter + 1):
-        if i in alpha_updates:
-            alpha = alpha_updates[i]
-        if i in alpha_restr_updates:
-            alpha_restr = alpha_restr_updates[i]
+        if alpha_ptr < len(alpha_keys) and i == alpha_keys[alpha_ptr]:
+            alpha = alpha_vals[alpha_ptr]
+            alpha_ptr += 1
+        if alpha_restr_ptr < len(alpha_restr_keys) and i == alpha_restr_keys[alpha_restr_ptr]:
+            alpha_restr = alpha_restr_vals[alpha_restr_ptr]
+            alpha_restr_ptr += 1
         
             
-        # correlation from trained SR model
-        c1_H_pred_SR, c1_O_pred_SR = neural.c1_twotype(model_H, model_O, rho_H, rho_O, input_bins, return_c2=False, output_dict=output_dict)
-        
+        # correlation from trained SR model; the evaluation and the
+        # restructuring transform below are refreshed together, only once the
+        # densities have drifted appreciably since the last evaluation
+        drift = max(kernels.max_abs_diff(rho_H, rho_H_at_last_c1),
+                    kernels.max_abs_diff(rho_O, rho_O_at_last_c1))
+        refresh = (c1_H_pred_SR is None
+                   or drift >= c1_refresh_tol * rho_max)
+        if refresh:
+            c1_H_pred_SR, c1_O_pred_SR = c1_fn(rho_H, rho_O)
+            rho_H_at_last_c1[:] = rho_H
+            rho_O_at_last_c1[:] = rho_O
         
-        c1_H_LR = c1_H_pred_SR - mu_H_correction + q_H * delta_phi
-        c1_O_LR = c1_O_pred_SR - mu_O_correction + q_O * delta_phi    
         
-        # update density
-        log_rho_H_new[validH] = muloc_H[validH]  + c1_H_LR[validH]
-        log_rho_O_new[validO] = muloc_O[validO]  + c1_O_LR[validO]
-        log_rho_H_new[~validH] = -np.inf
-        log_rho_O_new[~validO] = -np.inf
-        rho_H_new = np.exp(log_rho_H_new)
-        rho_O_new = np.exp(log_rho_O_new)
-        log_rho_H = (1 - alpha) * log_rho_H + alpha * log_rho_H_new
-        log_rho_O = (1 - alpha) * log_rho_O + alpha * log_rho_O_new
-        rho_H = np.exp(log_rho_H)
-        rho_O = np.exp(log_rho_O)
-
-
-
+        # update density and check convergence; the electrostatic correction
+        # c1_SR - mu_corr + q * delta_phi is folded into the step kernel
+        if mixer is None:
+            delta, rho_max = kernels.picard_step_twotype_lr(
+                log_rho_H, rho_H, muloc_H, c1_H_pred_SR, validH, mu_H_correction, q_H,
+                log_rho_O, rho_O, muloc_O, c1_O_pred_SR, validO, mu_O_correction, q_O,
+                delta_phi, alpha)
+        else:
+            log_rho_new_v = np.concatenate(
+                (muloc_H_v + c1_H_pred_SR.take(idxH) - mu_H_correction + q_H * delta_phi.take(idxH),
+                 muloc_O_v + c1_O_pred_SR.take(idxO) - mu_O_correction + q_O * delta_phi.take(idxO)))
+            log_rho_v = mixer.update(log_rho_v, log_rho_new_v, beta=alpha)
+            log_rho_H.put(idxH, log_rho_v[:n_validH])
+            log_rho_O.put(idxO, log_rho_v[n_validH:])
+            np.exp(log_rho_H, out=rho_H)
+            np.exp(log_rho_O, out=rho_O)
+            delta, rho_max = kernels.max_abs_diff_exp(log_rho_new_v, log_rho_v)
 
         #if delta_restr > tolerance_restr:
-        charge_density = rho_O * q_O + rho_H * q_H
-        kbins, n_k = lmft.fourier_transform(zbins, charge_density, kbins)
-        delta_phi_new = - lmft.restructure_electrostatic_potential(n_k, kbins, zbins, kappa_inv) * prefactor_restructure
-        
-        delta_H = np.max(np.abs(rho_H_new - rho_H))
-        delta_O = np.max(np.abs(rho_O_new - rho_O))
-        delta = max(delta_H, delta_O)
-        
-        
-        
-        
-        delta_restr = np.max(np.abs(delta_phi_new - delta_phi))
+        if refresh:
+            if ne is not None:
+                ne.evaluate("rho_O * q_O + rho_H * q_H", out=charge_density)
+            else:
+                np.multiply(rho_O, q_O, out=charge_density)
+                charge_density += rho_H * q_H
+            np.multiply(lmft.restructure_from_charge(charge_density, restr_kernel),
+                        -prefactor_restructure, out=delta_phi_new)
+
+        delta_restr = kernels.max_abs_diff(delta_phi_new, delta_phi)
         if delta < 1e-2 and delta_restr > tolerance_restr:
-            delta_phi =  (1 - alpha_restr) * delta_phi + alpha_restr * delta_phi_new
+            if ne is not None:
+                ne.evaluate("(1 - alpha_restr) * delta_phi + alpha_restr * delta_phi_new",
+                            out=delta_phi)
+            else:
+                delta_phi *= 1 - alpha_restr
+                delta_phi += alpha_restr * delta_phi_new
         else :
-            delta_phi = delta_phi_new
+            delta_phi[:] = delta_phi_new
         
         
         if np.isnan(delta):
@@ -408,11 +678,10 @@ def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
         #relative_error = delta / max(np.max(rho_O), np.max(rho_H))
         
         if plot and i % plot_every == 0:
-            charge_density = rho_O * q_O + rho_H * q_H
-            kbins, n_k = lmft.fourier_transform(zbins, charge_density, kbins)
-            delta_phi_temp = -lmft.restructure_electrostatic_potential(n_k, kbins, zbins, kappa_inv) * prefactor_restructure
+            # charge_density and delta_phi_new were just computed in the
+            # iteration body, so no extra transform is needed for plotting
             plt.plot_interactive_4panels(fig, ax, zbins, rho_H, rho_O,
-                                         charge_density, delta_phi_temp,
+                                         charge_density, delta_phi_new,
                                          muloc_H, muloc_O, color_count)
             color_count += 1
 
@@ -434,10 +703,16 @@ def minimise_LR_twotype(model_H, model_O, zbins, muloc_H, muloc_O,
     return None, None, None 
 
 def calculate_charge_density(rho_new, charge, L, zbins):
-    total_number_particle = np.trapz(rho_new, zbins) 
+    # on the uniform grid the trapezoid rule collapses to a single sum,
+    # sparing np.trapz its internal diff and product temporaries
+    dz = zbins[1] - zbins[0]
+    total_number_particle = dz * (rho_new.sum() - 0.5 * (rho_new[0] + rho_new[-1]))
     total_charge = total_number_particle * charge
     background_charge_density = total_charge / L
-    n_z = rho_new * charge - background_charge_density
+    if ne is not None:
+        n_z = ne.evaluate("rho_new * charge - background_charge_density")
+    else:
+        n_z = rho_new * charge - background_charge_density
     return n_z
 
 def update_electrostatic_potential(n_z, zbins, dz, kappa_inv, prefactor):
@@ -21,7 +21,7 @@ def generate_windows(array, bins):
     - np.ndarray: Array of sliding windows.
     """
     padded_array = np.pad(array, bins, mode="wrap")
-    windows = np.empty((len(array), 2 * bins + 1))
+    windows = np.empty((len(array), 2 * bins + 1), dtype=padded_array.dtype)
     for i in range(len(array)):
         windows[i] = padded_array[i:i + 2 * bins + 1]
     return windows
@@ -71,6 +71,147 @@ def c1_onetype(model, density_profile, input_bins, dx=0.01, return_c2=False, out
     
     return model.predict_on_batch(rho_windows).flatten()
 
+def compile_c1_onetype(model, input_bins, output_dict=False):
+    """
+    Build a compiled callable mapping a density profile to c1(x) entirely
+    inside the TensorFlow graph.
+
+    The wrap padding, sliding-window construction and forward pass are
+    traced once into a single tf.function, so each call costs one graph
+    dispatch instead of a NumPy window build followed by predict_on_batch.
+    Intended for iteration loops where the same model is evaluated many
+    times on profiles of fixed shape.
+
+    Parameters:
+    - model (tf.keras.Model): The neural correlation functional.
+    - input_bins (int): Number of input bins for the model.
+
+    Returns:
+    - callable: Function taking a density profile and returning c1(x).
+    """
+    window_bins = (input_bins - 1) // 2
+
+    @tf.function(reduce_retracing=True)
+    def c1_graph(rho):
+        padded = tf.concat([rho[-window_bins:], rho, rho[:window_bins]], axis=0)
+        rho_windows = tf.signal.frame(padded, input_bins, 1)
+        result = model(rho_windows[:, :, tf.newaxis], training=False)
+        if output_dict:
+            result = result["c1"]
+        return tf.reshape(result, [-1])
+
+    def c1_compiled(density_profile):
+        return c1_graph(tf.convert_to_tensor(density_profile)).numpy()
+
+    return c1_compiled
+
+def c1_onetype_batch(model, rho_batch, input_bins, output_dict=False):
+    """
+    Infer one-body direct correlation profiles for a batch of density profiles.
+
+    All profiles are stacked into a single forward pass, so the per-call
+    framework overhead is paid once for the whole batch instead of once
+    per profile.
+
+    Parameters:
+    - model (tf.keras.Model): The neural correlation functional.
+    - rho_batch (np.ndarray): Density profiles of shape (n_profiles, n_bins).
+    - input_bins (int): Number of input bins for the model.
+
+    Returns:
+    - np.ndarray: c1 profiles of shape (n_profiles, n_bins).
+    """
+    rho_batch = np.asarray(rho_batch)
+    n_profiles, n_bins = rho_batch.shape
+    window_bins = (input_bins - 1) // 2
+    rho_windows = np.empty((n_profiles, n_bins, 2 * window_bins + 1), dtype=rho_batch.dtype)
+    for k in range(n_profiles):
+        rho_windows[k] = generate_windows(rho_batch[k], window_bins)
+    rho_windows = rho_windows.reshape(n_profiles * n_bins, input_bins, 1)
+
+    result = model.predict_on_batch(rho_windows)
+    if output_dict:
+        result = result["c1"]
+    return result.reshape(n_profiles, n_bins)
+
+def compile_c1_twotype(model_H, model_O, input_bins, output_dict=False):
+    """
+    Build a compiled callable mapping the two density profiles to
+    (c1_H(x), c1_O(x)) entirely inside the TensorFlow graph.
+
+    Both models are traced into the same tf.function, so one graph
+    dispatch per call covers the padding, the window construction and the
+    two forward passes, which the runtime is then free to overlap. This
+    replaces two sequential predict_on_batch calls per Picard step.
+
+    Parameters:
+    - model_H, model_O (tf.keras.Model): The neural correlation functionals.
+    - input_bins (int): Number of input bins for the models.
+
+    Returns:
+    - callable: Function taking (rho_H, rho_O) and returning (c1_H, c1_O).
+    """
+    window_bins = (input_bins - 1) // 2
+
+    def make_windows(rho):
+        padded = tf.concat([rho[-window_bins:], rho, rho[:window_bins]], axis=0)
+        return tf.signal.frame(padded, input_bins, 1)[:, :, tf.newaxis]
+
+    @tf.function(reduce_retracing=True)
+    def c1_graph(rho_H, rho_O):
+        rhoH_windows = make_windows(rho_H)
+        rhoO_windows = make_windows(rho_O)
+        H_result = model_H([rhoH_windows, rhoO_windows], training=False)
+        O_result = model_O([rhoO_windows, rhoH_windows], training=False)
+        if output_dict:
+            H_result = H_result["c1_H"]
+            O_result = O_result["c1_O"]
+        return tf.reshape(H_result, [-1]), tf.reshape(O_result, [-1])
+
+    def c1_compiled(rho_H, rho_O):
+        c1_H, c1_O = c1_graph(tf.convert_to_tensor(rho_H), tf.convert_to_tensor(rho_O))
+        return c1_H.numpy(), c1_O.numpy()
+
+    return c1_compiled
+
+def c1_twotype_batch(model_H, model_O, rho_H_batch, rho_O_batch, input_bins, output_dict=False):
+    """
+    Infer one-body direct correlation profiles for a batch of two-type
+    density profiles.
+
+    All profiles are stacked into a single forward pass per model, so the
+    per-call framework overhead is paid once for the whole batch instead
+    of once per profile.
+
+    Parameters:
+    - model_H, model_O (tf.keras.Model): The neural correlation functionals.
+    - rho_H_batch, rho_O_batch (np.ndarray): Density profiles of shape
+                                             (n_profiles, n_bins).
+    - input_bins (int): Number of input bins for the models.
+
+    Returns:
+    - tuple: c1_H and c1_O profiles, each of shape (n_profiles, n_bins).
+    """
+    rho_H_batch = np.asarray(rho_H_batch)
+    rho_O_batch = np.asarray(rho_O_batch)
+    n_profiles, n_bins = rho_H_batch.shape
+    window_bins = (input_bins - 1) // 2
+    rhoH_windows = np.empty((n_profiles, n_bins, 2 * window_bins + 1), dtype=rho_H_batch.dtype)
+    rhoO_windows = np.empty((n_profiles, n_bins, 2 * window_bins + 1), dtype=rho_O_batch.dtype)
+    for k in range(n_profiles):
+        rhoH_windows[k] = generate_windows(rho_H_batch[k], window_bins)
+        rhoO_windows[k] = generate_windows(rho_O_batch[k], window_bins)
+    rhoH_windows = rhoH_windows.reshape(n_profiles * n_bins, input_bins, 1)
+    rhoO_windows = rhoO_windows.reshape(n_profiles * n_bins, input_bins, 1)
+
+    if output_dict:
+        c1H_result = model_H.predict_on_batch([rhoH_windows, rhoO_windows])["c1_H"]
+        c1O_result = model_O.predict_on_batch([rhoO_windows, rhoH_windows])["c1_O"]
+    else:
+        c1H_result = model_H.predict_on_batch([rhoH_windows, rhoO_windows])
+        c1O_result = model_O.predict_on_batch([rhoO_windows, rhoH_windows])
+    return c1H_result.reshape(n_profiles, n_bins), c1O_result.reshape(n_profiles, n_bins)
+
 def c1_twotype(model_H, model_O, rho_H, rho_O, input_bins, dx=0.03, return_c2=False, output_dict=False):
     """
     Infer the one-body direct correlation profile from a given density profile 